@@ -0,0 +1,45 @@
+import os
+import sys
+
+import tensorflow as tf
+
+# NOTE: int8/dynamic-range kernels are only optimized for ARM NEON and
+# Edge TPU targets. On x86 hosts they fall back to slow reference kernels
+# and add per-invoke dequantization, so the default conversion here keeps
+# float kernels and only shrinks the weights to float16. Only deploy the
+# int8 variant on aarch64/Coral.
+
+
+def convert_saved_model(saved_model_dir: str, int8: bool = False):
+    converter = tf.lite.TFLiteConverter.from_saved_model(saved_model_dir)
+
+    if int8:
+        # ARM/TPU only: dynamic-range quantization
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        output_name = "model_int8.tflite"
+    else:
+        # float16 weights, float32 kernels - safe on x86
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+        output_name = "model.tflite"
+
+    tflite_model = converter.convert()
+
+    output_path = os.path.join(saved_model_dir, output_name)
+    with open(output_path, 'wb') as f:
+        f.write(tflite_model)
+
+    print(f"Converted {saved_model_dir} -> {output_path} ({len(tflite_model)} bytes)")
+    return output_path
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    int8 = '--int8' in args
+    model_dirs = [a for a in args if a != '--int8'] or ["./model/bilstm_bo_opt/"]
+
+    for model_dir in model_dirs:
+        try:
+            convert_saved_model(model_dir, int8=int8)
+        except Exception as e:
+            print(f"Failed to convert {model_dir}: {e}")
@@ -1,3 +1,6 @@
+import math
+import os
+import platform
 from typing import List
 import threading
 
@@ -7,105 +10,357 @@ import numpy as np
 from sklearn.base import TransformerMixin
 import tensorflow as tf
 
+try:
+    from tflite_runtime.interpreter import Interpreter, load_delegate
+except ImportError:
+    from tensorflow.lite import Interpreter
+    from tensorflow.lite.experimental import load_delegate
+
+try:
+    import grpc
+    from tensorflow_serving.apis import (get_model_metadata_pb2, predict_pb2,
+                                         prediction_service_pb2_grpc)
+except ImportError:
+    grpc = None
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
 @dataclass
 class ValidationThresholds:
     max_spike_multiplier: float
     max_historical_multiplier: float
 
 class ModelHandler:
-    def __init__(self, model_path: str):
+    def __init__(self, model_path: str, serving_url: str = None):
         self.model_path = model_path
         self.model = None
         self.is_loaded = False
+        # Guards loading only; inference itself runs unlocked with one
+        # interpreter (and input buffer) per thread
         self.model_lock = threading.Lock()
-        
+        # The SavedModel fallback funnels every caller through one shared
+        # input Variable, so that path alone serializes (see _predict_raw)
+        self._savedmodel_lock = threading.Lock()
+        self._model_bytes = None
+        self._local = threading.local()
+
         self.sequence_length = 10
         self.input_shape = (1, 10, 1)
 
+        # Optional remote TF Serving backend. The server should run with
+        # --enable_batching so predictions from concurrent autoscaler tasks
+        # are batched server-side; the stub itself is thread-safe.
+        self.serving_url = serving_url or os.environ.get("TF_SERVING_URL")
+        self.serving_model_name = os.path.basename(os.path.normpath(model_path))
+        self.stub = None
+        self.onnx_session = None
+
         self._load_model()
-    
+
+    def _resolve_tflite_path(self):
+        # int8 kernels are only optimized for ARM NEON; on x86 they regress
+        # badly, so the quantized variant is only picked up on ARM hosts
+        if platform.machine() in ("aarch64", "armv7l"):
+            int8_path = os.path.join(self.model_path, "model_int8.tflite")
+            if os.path.exists(int8_path):
+                return int8_path
+
+        return os.path.join(self.model_path, "model.tflite")
+
+    def _create_interpreter(self):
+        # Prefer an Edge TPU delegate when a compiled int8 model is present;
+        # fall back to the CPU interpreter if no TPU/runtime is available
+        edgetpu_path = os.path.join(self.model_path, "model_edgetpu.tflite")
+        if os.path.exists(edgetpu_path):
+            try:
+                interpreter = Interpreter(
+                    model_path=edgetpu_path,
+                    experimental_delegates=[load_delegate('libedgetpu.so.1')]
+                )
+                print("Using Edge TPU delegate for inference")
+                return interpreter
+            except Exception as e:
+                print(f"Edge TPU delegate unavailable, using CPU interpreter: {e}")
+
+        # num_threads=1: per-invoke parallelism only oversubscribes cores
+        # when many services predict concurrently, and a (1,10,1) model is
+        # faster single-threaded anyway
+        return Interpreter(model_content=self._model_bytes, num_threads=1)
+
+    def _get_interpreter(self):
+        # One interpreter per thread over the shared FlatBuffer bytes, so
+        # concurrent predictions never serialize on a lock
+        interpreter = getattr(self._local, 'interpreter', None)
+        if interpreter is None:
+            interpreter = self._create_interpreter()
+            interpreter.allocate_tensors()
+
+            self._local.interpreter = interpreter
+            self._local.input_index = interpreter.get_input_details()[0]['index']
+            self._local.output_index = interpreter.get_output_details()[0]['index']
+
+        return interpreter
+
+    def _get_input_buf(self):
+        # Reused per-thread input buffer; for a 10-sample window the
+        # per-call allocations/dtype inference dominate, not the math
+        input_buf = getattr(self._local, 'input_buf', None)
+        if input_buf is None:
+            input_buf = np.empty(self.input_shape, dtype=np.float32)
+            self._local.input_buf = input_buf
+
+        return input_buf
+
     def _load_model(self):
         with self.model_lock:
-            self.model = tf.saved_model.load(self.model_path)
-            
-            self.serving_fn = self.model.signatures['serving_default']
-            
+            if self.serving_url and grpc is not None:
+                channel = grpc.insecure_channel(self.serving_url)
+                self.stub = prediction_service_pb2_grpc.PredictionServiceStub(channel)
+
+                # The signature's input key depends on the export (Keras
+                # names it after the input layer, not 'inputs'), so resolve
+                # it once from the server's metadata; TF_SERVING_INPUT_NAME
+                # overrides for servers that don't expose metadata
+                self._serving_input_name = os.environ.get("TF_SERVING_INPUT_NAME")
+                if self._serving_input_name is None:
+                    try:
+                        meta_request = get_model_metadata_pb2.GetModelMetadataRequest()
+                        meta_request.model_spec.name = self.serving_model_name
+                        meta_request.metadata_field.append('signature_def')
+
+                        metadata = self.stub.GetModelMetadata(meta_request, timeout=10.0)
+
+                        signature_map = get_model_metadata_pb2.SignatureDefMap()
+                        metadata.metadata['signature_def'].Unpack(signature_map)
+                        signature = signature_map.signature_def['serving_default']
+                        self._serving_input_name = next(iter(signature.inputs))
+                    except Exception as e:
+                        print(f"Could not resolve serving input name, using 'inputs': {e}")
+                        self._serving_input_name = 'inputs'
+
+                self.is_loaded = True
+
+                return True
+
+            # ONNX Runtime backend (export offline with
+            # python -m tf2onnx.convert --saved-model <dir> --output
+            # <dir>/model.onnx --opset 17): graph fusion plus MLAS kernels
+            # on x86, without pulling the TF runtime into the hot path
+            onnx_path = os.path.join(self.model_path, "model.onnx")
+            if ort is not None and os.path.exists(onnx_path):
+                sess_options = ort.SessionOptions()
+                sess_options.graph_optimization_level = \
+                    ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+                sess_options.intra_op_num_threads = 1
+                sess_options.inter_op_num_threads = 1
+
+                self.onnx_session = ort.InferenceSession(
+                    onnx_path,
+                    sess_options=sess_options,
+                    providers=['CPUExecutionProvider']
+                )
+                self._onnx_input_name = self.onnx_session.get_inputs()[0].name
+                self._onnx_output_name = self.onnx_session.get_outputs()[0].name
+
+                self.is_loaded = True
+
+                self._warmup()
+
+                return True
+
+            tflite_path = self._resolve_tflite_path()
+
+            if os.path.exists(tflite_path):
+                # TFLite FlatBuffer (see convert_model.py): fused kernels,
+                # no per-call signature/dict plumbing. Bytes are loaded once
+                # and shared by the per-thread interpreters.
+                with open(tflite_path, 'rb') as f:
+                    self._model_bytes = f.read()
+
+                self._get_interpreter()
+            else:
+                # Single-threaded kernels: per-invoke parallelism only
+                # oversubscribes cores once several services predict at once
+                try:
+                    tf.config.threading.set_intra_op_parallelism_threads(1)
+                    tf.config.threading.set_inter_op_parallelism_threads(1)
+                except RuntimeError:
+                    pass  # TF context already initialized; counts are sticky
+
+                # Fallback to the original SavedModel
+                self.model = tf.saved_model.load(self.model_path)
+
+                self.serving_fn = self.model.signatures['serving_default']
+
+                # Resolve signature keys once and XLA-compile the call for
+                # the fixed (1,10,1) shape, so per-prediction dispatch is a
+                # single fused kernel instead of signature/dict plumbing
+                self._input_key = list(
+                    self.serving_fn.structured_input_signature[1].keys())[0]
+                self._output_key = list(
+                    self.serving_fn.structured_outputs.keys())[0]
+
+                serving_fn = self.serving_fn
+                input_key = self._input_key
+                output_key = self._output_key
+
+                self._compiled_fn = tf.function(
+                    lambda x: serving_fn(**{input_key: x})[output_key],
+                    jit_compile=True,
+                    input_signature=[tf.TensorSpec(self.input_shape, tf.float32)]
+                )
+
+                # Persistent input tensor: assigning into one Variable reuses
+                # the same device buffer instead of allocating a fresh tensor
+                # (and host->device copy) on every call
+                self._input_var = tf.Variable(
+                    tf.zeros(self.input_shape, tf.float32), trainable=False)
+
+                compiled_fn = self._compiled_fn
+                input_var = self._input_var
+
+                def _run(x):
+                    input_var.assign(x)
+                    return compiled_fn(input_var)
+
+                self._run_fn = tf.function(
+                    _run,
+                    input_signature=[tf.TensorSpec(self.input_shape, tf.float32)]
+                )
+
             self.is_loaded = True
-            
+
+            self._warmup()
+
             return True
 
-    def _preprocess_data(self, historical_data: List, scaler: TransformerMixin):
-            data_array = np.array(historical_data)
-            
-            scaled_data_array = scaler.fit_transform(data_array)
+    def _warmup(self):
+        # One dummy invoke triggers lazy kernel selection / XLA compilation
+        # so the first real prediction isn't penalized
+        try:
+            self._predict_raw(np.zeros(self.input_shape, dtype=np.float32))
+        except Exception as e:
+            print(f"Model warmup failed: {e}")
+
+    def _preprocess_data(self, data_array: np.ndarray, scaler: TransformerMixin):
+            input_buf = self._get_input_buf()
+
+            np.copyto(input_buf.reshape(self.sequence_length, 1),
+                      data_array)
+
+            # in-place MinMax transform (X * scale_ + min_) with the stats
+            # fit once in predict; refitting per tick wasted a pass over the
+            # window and silently shifted the inverse transform
+            np.multiply(input_buf, scaler.scale_[0], out=input_buf)
+            np.add(input_buf, scaler.min_[0], out=input_buf)
 
-            reshaped_data = scaled_data_array.reshape(self.input_shape)
-            
-            return reshaped_data
+            return input_buf
 
     def _predict_raw(self, input_data: np.ndarray):
-            input_tensor = tf.constant(input_data, dtype=tf.float32)
-            
-            input_keys = list(self.serving_fn.structured_input_signature[1].keys())
-            if not input_keys:
-                return None
-            
-            input_key = input_keys[0]
-            
-            prediction = self.serving_fn(**{input_key: input_tensor})
-            
-            output_keys = list(prediction.keys())
-            if not output_keys:
-                return None
-            
-            output_key = output_keys[0]
-            pred_value = prediction[output_key].numpy()
-            
-            return pred_value    
-
-    def _validate_prediction(self, 
-                           prediction: float, 
-                           historical_data: List,
+            if self.stub is not None:
+                request = predict_pb2.PredictRequest()
+                request.model_spec.name = self.serving_model_name
+                request.model_spec.signature_name = 'serving_default'
+                request.inputs[self._serving_input_name].CopyFrom(
+                    tf.make_tensor_proto(input_data, dtype=tf.float32))
+
+                response = self.stub.Predict(request, timeout=10.0)
+
+                output_keys = list(response.outputs.keys())
+                if not output_keys:
+                    return None
+
+                return tf.make_ndarray(response.outputs[output_keys[0]])
+
+            if self.onnx_session is not None:
+                # InferenceSession.run is thread-safe; names cached at load
+                return self.onnx_session.run(
+                    [self._onnx_output_name],
+                    {self._onnx_input_name: input_data}
+                )[0]
+
+            if self._model_bytes is not None:
+                interpreter = self._get_interpreter()
+
+                interpreter.set_tensor(self._local.input_index, input_data)
+                interpreter.invoke()
+
+                return interpreter.get_tensor(self._local.output_index)
+
+            # The np.ndarray buffer is handed over as-is; _run_fn assigns it
+            # into the persistent input Variable, no tf.constant per call.
+            # That Variable is shared process-wide, so concurrent callers
+            # (the operator predicts from a thread pool) must not interleave
+            # assign/call pairs and read each other's output - this slow
+            # fallback serializes; the backends above stay lock-free.
+            with self._savedmodel_lock:
+                return self._run_fn(input_data).numpy()
+
+    def _validate_prediction(self,
+                           prediction: float,
+                           data_array: np.ndarray,
                            thresholds: ValidationThresholds):
-            if prediction < 0:
-                return False
+            if data_array.size == 0:
+                return prediction >= 0
 
-            if not historical_data:
-                return True
+            # data_array is the window already parsed in predict; no fresh
+            # allocation or Python re-indexing per call. Attribute reads are
+            # hoisted and a zero guard value relaxes its cap to +inf, so the
+            # whole check collapses to one bounds comparison.
+            spike_multiplier = thresholds.max_spike_multiplier
+            historical_multiplier = thresholds.max_historical_multiplier
 
-            current_load = historical_data[-1][0] if historical_data else 0
-            historical_avg = np.mean(historical_data)
-            
-            if current_load > 0 and prediction > current_load * thresholds.max_spike_multiplier:
-                return False
-            
-            if historical_avg > 0 and prediction > historical_avg * thresholds.max_historical_multiplier:
-                return False
+            current_load = float(data_array[-1, 0])
+            historical_avg = float(data_array.mean())
 
-            return True
+            spike_cap = current_load * spike_multiplier if current_load > 0 else math.inf
+            historical_cap = historical_avg * historical_multiplier if historical_avg > 0 else math.inf
+
+            return 0.0 <= prediction <= min(spike_cap, historical_cap)
     
     def predict(self, 
                 historical_data: List, 
                 scaler: TransformerMixin, 
                 thresholds: ValidationThresholds):
 
-        if not self.is_loaded or self.model is None:
+        if not self.is_loaded:
             if not self._load_model():
                 return None
 
-        processed_data = self._preprocess_data(historical_data, scaler)
+        data_array = np.asarray(historical_data, dtype=np.float32)
+
+        if getattr(scaler, 'n_samples_seen_', 0) == 0:
+            if data_array.size == 0:
+                return None
+
+            # A zero-range window (typically the all-zero history of a
+            # freshly deployed service) would fit degenerate stats
+            # (scale_=2, min_=-1) that cap every later inverse transform
+            # near zero. Hold off fitting until real variation shows up
+            # and return a persistence forecast in the meantime.
+            if float(np.ptp(data_array)) == 0.0:
+                return float(data_array[-1, 0])
+
+            scaler.fit(data_array)
+
+        processed_data = self._preprocess_data(data_array, scaler)
         if processed_data is None:
             return None
         
-        with self.model_lock:
-            prediction = self._predict_raw(processed_data)
+        # No lock here: the gRPC stub is thread-safe and TFLite interpreters
+        # are per-thread; only the SavedModel fallback locks internally
+        # around its shared input Variable
+        prediction = self._predict_raw(processed_data)
         
         if prediction is None:
             return None
 
         scaled_prediction = scaler.inverse_transform(prediction)[0][0]
         
-        if not self._validate_prediction(scaled_prediction, historical_data, thresholds):
+        if not self._validate_prediction(scaled_prediction, data_array, thresholds):
             return None
 
         return scaled_prediction
\ No newline at end of file
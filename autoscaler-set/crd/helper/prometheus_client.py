@@ -1,5 +1,8 @@
 from typing import List, Optional, Dict, Any
+from collections import deque, namedtuple
 from datetime import datetime, timedelta
+import asyncio
+import json
 import time
 
 from dataclasses import dataclass
@@ -7,13 +10,59 @@ from dataclasses import dataclass
 import threading
 from urllib.parse import urljoin
 
+import numpy as np
 import requests
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+if numba is not None:
+    @numba.njit(cache=True, fastmath=True)
+    def _align_samples(timestamps, values, expected, tolerance):
+        # Two-pointer merge over the sorted sample/mark arrays; compiled to
+        # native code so long windows cost no interpreter time at all
+        out = np.zeros(expected.shape[0], dtype=np.float64)
+        j = 0
+        n = timestamps.shape[0]
+
+        for i in range(expected.shape[0]):
+            target = expected[i]
+            while j + 1 < n and abs(timestamps[j + 1] - target) <= abs(timestamps[j] - target):
+                j += 1
+            if abs(timestamps[j] - target) <= tolerance:
+                out[i] = values[j]
+
+        return out
+
+    # Compile once at import so the first tick isn't penalized
+    _align_samples(np.zeros(1), np.zeros(1), np.zeros(1), 30.0)
+else:
+    _align_samples = None
+
+# SoA layout for a parsed Prometheus result: two contiguous arrays instead
+# of a list of per-sample tuples, so alignment stays fully vectorized
+Series = namedtuple('Series', ['timestamps', 'values'])
+
 @dataclass
 class QueryConfig:
     service_name: str
     window_minutes: int
     query_template: Optional[str]
+    # Template with the service already substituted, rendered once when the
+    # CRD is loaded; when set, per-query str.format calls are skipped
+    rendered_query: Optional[str] = None
 
 class PrometheusClient:
     def __init__(self, 
@@ -25,7 +74,32 @@ class PrometheusClient:
         self.timeout_seconds = timeout_seconds
         self.max_retries = max_retries
         self.session = requests.Session()
-        self.client_lock = threading.Lock()
+        # requests decodes gzip transparently; this just cuts network bytes
+        # on large query_range payloads. Keep-alive keeps the TCP/TLS
+        # sessions to Prometheus open across queries.
+        self.session.headers.update({
+            'Accept-Encoding': 'gzip',
+            'Connection': 'keep-alive'
+        })
+        # Session GETs are thread-safe; pool enough connections that
+        # concurrent per-service queries don't wait on each other. Retries
+        # stay with our own backoff loop, not urllib3's.
+        adapter = requests.adapters.HTTPAdapter(pool_connections=64,
+                                                pool_maxsize=64,
+                                                max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # Skip per-request proxy/env lookups; Prometheus is reached directly
+        self.session.trust_env = False
+        # Only guards the health-state fields below, never the HTTP round-trip
+        self.state_lock = threading.Lock()
+
+        # Lazily created aiohttp session for the async query path
+        self._aio_session = None
+
+        # Per-service (epoch, value) samples from previous ticks; successive
+        # windows overlap by window-1 minutes, so only the tail is refetched
+        self._history_cache: Dict[str, deque] = {}
         
         # Default query template
         self.default_query_template = 'sum(rate(flask_requests_total[1m])) * 60'
@@ -37,7 +111,26 @@ class PrometheusClient:
         
         # Test connection on initialization
         self._test_connection()
-    
+
+    def _mark_success(self):
+        with self.state_lock:
+            self.last_successful_query = datetime.now()
+            self.consecutive_failures = 0
+            self.is_healthy = True
+
+    def _mark_failure(self):
+        with self.state_lock:
+            self.consecutive_failures += 1
+            self.is_healthy = False
+
+    @staticmethod
+    def _decode_json(response):
+        # orjson parses straight from bytes, ~3-5x faster than the stdlib
+        # json that response.json() would use
+        if orjson is not None:
+            return orjson.loads(response.content)
+        return response.json()
+
     def _test_connection(self):
         try:
             test_url = urljoin(self.prometheus_url, "/api/v1/query")
@@ -49,20 +142,21 @@ class PrometheusClient:
             response = self.session.get(
                 test_url,
                 params=test_params,
-                timeout=self.timeout_seconds
+                timeout=self.timeout_seconds,
+                allow_redirects=False
             )
             response.raise_for_status()
             
-            data = response.json()
+            data = self._decode_json(response)
             if data.get('status') == 'success':
-                self.is_healthy = True
-                self.consecutive_failures = 0
+                self._mark_success()
                 return True
             else:
                 return False
-                
+
         except Exception as e:
-            self.is_healthy = False
+            with self.state_lock:
+                self.is_healthy = False
             return False
     
     def _execute_range_query(self, 
@@ -85,32 +179,29 @@ class PrometheusClient:
                 response = self.session.get(
                     url,
                     params=params,
-                    timeout=self.timeout_seconds
+                    timeout=self.timeout_seconds,
+                    allow_redirects=False
                 )
                 response.raise_for_status()
                 
-                data = response.json()
-                
+                data = self._decode_json(response)
+
                 if data.get('status') != 'success':
                     raise Exception(f"Query status: {data.get('status')}, error: {data.get('error')}")
-                
-                self.last_successful_query = datetime.now()
-                self.consecutive_failures = 0
-                self.is_healthy = True
-                
+
+                self._mark_success()
+
                 return data
-                
+
             except requests.exceptions.RequestException as e:
                 if attempt < self.max_retries - 1:
                     wait_time = 2 ** attempt
                     time.sleep(wait_time)
                 else:
-                    self.consecutive_failures += 1
-                    self.is_healthy = False
-                    
+                    self._mark_failure()
+
             except Exception as e:
-                self.consecutive_failures += 1
-                self.is_healthy = False
+                self._mark_failure()
                 break
         
         return None
@@ -118,78 +209,319 @@ class PrometheusClient:
     def _parse_query_result(self, data: Dict[str, Any]):
         try:
             result_data = data.get('data', {}).get('result', [])
-            
+
             if not result_data:
-                return []
-            
-            parsed_data = []
-            
+                return None
+
+            sample_lists = []
+
             for series in result_data:
                 if 'value' in series:
                     # Instant query result
-                    timestamp_str, value_str = series['value']
-                    timestamp = datetime.fromtimestamp(float(timestamp_str))
-                    value = float(value_str) if value_str != 'NaN' else 0.0
-                    parsed_data.append((timestamp, value))
-                    
-                elif 'values' in series:
+                    sample_lists.append([series['value']])
+
+                elif series.get('values'):
                     # Range query result
-                    for timestamp_str, value_str in series['values']:
-                        timestamp = datetime.fromtimestamp(float(timestamp_str))
-                        value = float(value_str) if value_str != 'NaN' else 0.0
-                        parsed_data.append((timestamp, value))
-            
-            # Sort by timestamp
-            parsed_data.sort(key=lambda x: x[0])
-            
-            return parsed_data
-            
+                    sample_lists.append(series['values'])
+
+            if not sample_lists:
+                return None
+
+            # One preallocated (n, 2) matrix filled per series with a C-level
+            # parse of the [timestamp, "value"] pairs ('NaN' strings included);
+            # no temporary chunk list or concatenate copy
+            n = sum(len(sample_list) for sample_list in sample_lists)
+            samples = np.empty((n, 2), dtype=np.float64)
+
+            offset = 0
+            for sample_list in sample_lists:
+                samples[offset:offset + len(sample_list)] = np.array(
+                    sample_list, dtype=np.float64)
+                offset += len(sample_list)
+
+            np.nan_to_num(samples, copy=False, nan=0.0)
+
+            # Sort by timestamp; epoch seconds stay as int64/float64 arrays so
+            # the alignment below is pure vectorized math, no datetime objects
+            samples = samples[samples[:, 0].argsort()]
+
+            return Series(timestamps=samples[:, 0].astype(np.int64),
+                          values=np.ascontiguousarray(samples[:, 1]))
+
         except Exception as e:
-            return []
+            return None
     
+    def _build_window(self, data: Dict[str, Any], end_time: datetime, window_minutes: int):
+        # Parse result: an empty result set (idle service) is a valid zero
+        # window and must use the same [[v], ...] row shape as the other
+        # paths so _merge_cache can index value[0]
+        parsed = self._parse_query_result(data)
+        if parsed is None:
+            return [[0.0]] * window_minutes
+
+        timestamps, values = parsed.timestamps, parsed.values
+
+        # Align to exactly window_minutes points on 1-minute marks:
+        # searchsorted finds each expected timestamp's neighbours in
+        # O(W log N) instead of scanning all samples per mark
+        end_epoch = int(end_time.timestamp())
+        expected = np.arange(end_epoch - (window_minutes - 1) * 60,
+                             end_epoch + 1, 60, dtype=np.int64)
+
+        if _align_samples is not None:
+            aligned = _align_samples(timestamps.astype(np.float64), values,
+                                     expected.astype(np.float64), 30.0)
+            return aligned.reshape(-1, 1).tolist()
+
+        idx = np.searchsorted(timestamps, expected)
+        left = np.clip(idx - 1, 0, len(timestamps) - 1)
+        right = np.clip(idx, 0, len(timestamps) - 1)
+
+        left_diff = np.abs(timestamps[left] - expected)
+        right_diff = np.abs(timestamps[right] - expected)
+
+        nearest = np.where(right_diff < left_diff, right, left)
+        nearest_diff = np.minimum(left_diff, right_diff)
+
+        # Only accept samples within 30 seconds of the expected mark
+        aligned = np.where(nearest_diff <= 30, values[nearest], 0.0)
+
+        return aligned.reshape(-1, 1).tolist()
+
+    @staticmethod
+    def _cache_key(query_config: QueryConfig):
+        # Same composite key as the operator's TTL cache: two CRDs sharing
+        # a service but differing in window or template must not feed the
+        # same history deque
+        return (query_config.service_name,
+                query_config.window_minutes,
+                query_config.query_template)
+
+    def _plan_fetch(self, cache_key: tuple, window_minutes: int, end_epoch: int):
+        """Decide how many trailing minutes actually need fetching"""
+        cache = self._history_cache.get(cache_key)
+
+        # After a failure the cached tail may have holes; refetch everything
+        if cache is not None and self.consecutive_failures > 0:
+            del self._history_cache[cache_key]
+            cache = None
+
+        if not cache:
+            return window_minutes
+
+        delta_minutes = (end_epoch - cache[-1][0]) // 60
+        if delta_minutes >= window_minutes:
+            return window_minutes
+
+        return max(int(delta_minutes), 1)
+
+    def _merge_cache(self, cache_key: tuple, window_minutes: int,
+                     end_epoch: int, fetch_minutes: int, tail: List):
+        """Append freshly fetched minutes and return the trailing window"""
+        cache = self._history_cache.get(cache_key)
+        if cache is None:
+            cache = deque(maxlen=window_minutes * 2)
+            self._history_cache[cache_key] = cache
+
+        ts = end_epoch - (fetch_minutes - 1) * 60
+        for value in tail:
+            if cache and ts - cache[-1][0] < 60:
+                # Still inside the last cached minute (the fetch floor is
+                # 1 minute): refresh that bucket in place instead of
+                # appending a duplicate that would shift a real minute out
+                # of the returned window
+                cache[-1] = (cache[-1][0], value[0])
+            else:
+                cache.append((ts, value[0]))
+            ts += 60
+
+        historical_values = [[value] for _, value in list(cache)[-window_minutes:]]
+
+        # Zero-pad on the left if the cache hasn't filled a whole window yet
+        if len(historical_values) < window_minutes:
+            historical_values = ([[0.0]] * (window_minutes - len(historical_values))
+                                 + historical_values)
+
+        return historical_values
+
     def get_historical_workload(self, query_config: QueryConfig):
-        with self.client_lock:
-            try:
-                # Use provided template or default
+        # No client-wide lock: the pooled session handles concurrent GETs and
+        # parsing touches only locals, so callers query in parallel
+        try:
+            # Prefer the query rendered at CRD load; fall back to formatting
+            # the template for callers that didn't pre-render
+            query = getattr(query_config, 'rendered_query', None)
+            if not query:
                 template = query_config.query_template or self.default_query_template
                 query = template.format(service=query_config.service_name)
-                
-                # Calculate time range
-                end_time = datetime.now()
-                start_time = end_time - timedelta(minutes=query_config.window_minutes)
-                
-                # Execute range query
-                data = self._execute_range_query(query, start_time, end_time, "1m")
-                if data is None:
-                    return None
-                
-                # Parse result
-                parsed_data = self._parse_query_result(data)
-                if not parsed_data:
-                    return [0.0] * query_config.window_minutes
-                
-                # Ensure we have exactly window_minutes data points
-                historical_values = []
-                expected_timestamps = []
-                
-                # Generate expected timestamps (1-minute intervals)
-                for i in range(query_config.window_minutes):
-                    expected_timestamps.append(end_time - timedelta(minutes=query_config.window_minutes - 1 - i))
-                
-                for expected_ts in expected_timestamps:
-                    # Find closest data point within 30 seconds
-                    closest_value = 0.0
-                    closest_diff = float('inf')
-                    
-                    for data_ts, data_value in parsed_data:
-                        diff = abs((data_ts - expected_ts).total_seconds())
-                        if diff < closest_diff and diff <= 30:  # Within 30 seconds
-                            closest_diff = diff
-                            closest_value = data_value
-                    
-                    historical_values.append([closest_value])
-                
-                return historical_values
-                
+
+            # Calculate time range; only the minutes missing from the cache
+            # are fetched, usually just the newest one
+            end_time = datetime.now()
+            end_epoch = int(end_time.timestamp())
+            cache_key = self._cache_key(query_config)
+            fetch_minutes = self._plan_fetch(cache_key,
+                                             query_config.window_minutes,
+                                             end_epoch)
+            start_time = end_time - timedelta(minutes=fetch_minutes)
+
+            # Execute range query
+            data = self._execute_range_query(query, start_time, end_time, "1m")
+            if data is None:
+                return None
+
+            tail = self._build_window(data, end_time, fetch_minutes)
+
+            return self._merge_cache(cache_key,
+                                     query_config.window_minutes,
+                                     end_epoch, fetch_minutes, tail)
+
+        except Exception as e:
+            return None
+
+    def get_historical_workload_batch(self, query_configs: List[QueryConfig]):
+        # One grouped range query covers every service: a single HTTP
+        # round-trip and JSON parse instead of one per service
+        try:
+            if not query_configs:
+                return {}
+
+            # The grouped query below is the sum-by-service form of the
+            # default template only; configs carrying a custom template
+            # keep their semantics by going through the single-service path
+            custom = [qc for qc in query_configs
+                      if qc.query_template
+                      and qc.query_template != self.default_query_template]
+            query_configs = [qc for qc in query_configs if qc not in custom]
+
+            workloads = {}
+            for qc in custom:
+                workloads[qc.service_name] = self.get_historical_workload(qc)
+
+            if not query_configs:
+                return workloads
+
+            window = max(qc.window_minutes for qc in query_configs)
+            pattern = '|'.join(qc.service_name for qc in query_configs)
+            query = (f'sum by(service)'
+                     f'(rate(flask_requests_total{{service=~"{pattern}"}}[1m])) * 60')
+
+            end_time = datetime.now()
+            start_time = end_time - timedelta(minutes=window)
+
+            data = self._execute_range_query(query, start_time, end_time, "1m")
+            if data is None:
+                return None
+
+            # Split the grouped result back out by service label
+            per_service: Dict[str, list] = {}
+            for series in data.get('data', {}).get('result', []):
+                service = series.get('metric', {}).get('service')
+                if service:
+                    per_service.setdefault(service, []).append(series)
+
+            for qc in query_configs:
+                # Services absent from the grouped result (idle, no samples)
+                # hit _build_window's empty path and come back as a zero
+                # window in the same [[v], ...] row shape as everyone else
+                service_result = {'data': {'result': per_service.get(qc.service_name, [])}}
+                workloads[qc.service_name] = self._build_window(
+                    service_result, end_time, qc.window_minutes)
+
+            return workloads
+
+        except Exception as e:
+            return None
+
+    async def _get_aio_session(self):
+        if self._aio_session is None or self._aio_session.closed:
+            self._aio_session = aiohttp.ClientSession(
+                headers={'Accept-Encoding': 'gzip'},
+                timeout=aiohttp.ClientTimeout(total=self.timeout_seconds)
+            )
+
+        return self._aio_session
+
+    async def _execute_range_query_async(self,
+                                       query: str,
+                                       start_time: datetime,
+                                       end_time: datetime,
+                                       step: str = "1m"):
+
+        url = urljoin(self.prometheus_url, "/api/v1/query_range")
+        params = {
+            'query': query,
+            'start': int(start_time.timestamp()),
+            'end': int(end_time.timestamp()),
+            'step': step
+        }
+
+        session = await self._get_aio_session()
+
+        for attempt in range(self.max_retries):
+            try:
+                async with session.get(url, params=params) as response:
+                    response.raise_for_status()
+                    body = await response.read()
+
+                data = orjson.loads(body) if orjson is not None else json.loads(body)
+
+                if data.get('status') != 'success':
+                    raise Exception(f"Query status: {data.get('status')}, error: {data.get('error')}")
+
+                self._mark_success()
+
+                return data
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt < self.max_retries - 1:
+                    # Backoff without stalling the event loop; other pending
+                    # scrapes keep running while this one waits
+                    await asyncio.sleep(min(2 ** attempt, 8))
+                else:
+                    self._mark_failure()
+
             except Exception as e:
-                return None
\ No newline at end of file
+                self._mark_failure()
+                break
+
+        return None
+
+    async def get_historical_workload_async(self, query_config: QueryConfig):
+        if aiohttp is None:
+            # No aiohttp available: run the blocking client off the loop
+            return await asyncio.get_running_loop().run_in_executor(
+                None,
+                lambda: self.get_historical_workload(query_config)
+            )
+
+        try:
+            query = getattr(query_config, 'rendered_query', None)
+            if not query:
+                template = query_config.query_template or self.default_query_template
+                query = template.format(service=query_config.service_name)
+
+            end_time = datetime.now()
+            end_epoch = int(end_time.timestamp())
+            cache_key = self._cache_key(query_config)
+            fetch_minutes = self._plan_fetch(cache_key,
+                                             query_config.window_minutes,
+                                             end_epoch)
+            start_time = end_time - timedelta(minutes=fetch_minutes)
+
+            data = await self._execute_range_query_async(query, start_time, end_time, "1m")
+            if data is None:
+                return None
+
+            tail = self._build_window(data, end_time, fetch_minutes)
+
+            return self._merge_cache(cache_key,
+                                     query_config.window_minutes,
+                                     end_epoch, fetch_minutes, tail)
+
+        except Exception as e:
+            return None
+
+    async def close(self):
+        if self._aio_session is not None and not self._aio_session.closed:
+            await self._aio_session.close()
\ No newline at end of file
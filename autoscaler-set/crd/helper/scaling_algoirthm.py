@@ -1,8 +1,16 @@
-import math
+import os
+import time
 
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+
+import numpy as np
+
+# Human-readable reasons on the quiescent (cooldown / no-op) path are only
+# consumed by debug logging; leave them unformatted unless enabled so the
+# hot path doesn't pay an f-string and string alloc every tick. Follows
+# the same AUTOSCALER_DEBUG switch that turns on debug logging in main.
+LOG_REASONS = bool(os.environ.get('AUTOSCALER_DEBUG'))
 
 @dataclass
 class ScalingConfig:
@@ -12,6 +20,26 @@ class ScalingConfig:
     resource_removal_strategy: float  # RRS percentage (0.0 to 1.0)
     cooldown_period: int  # CDT in seconds
 
+    def __post_init__(self):
+        # Validated once here so the per-decision hot path doesn't need a
+        # division-by-zero guard
+        if self.workload_per_pod <= 0:
+            self.workload_per_pod = 1
+        # The CRD schema declares a number, but legacy manifests (and the
+        # old main.py fallback) carried strings like 'gradual'; coerce to
+        # the schema default instead of failing the whole CRD load
+        try:
+            rrs = float(self.resource_removal_strategy)
+        except (TypeError, ValueError):
+            print(f"Invalid resourceRemovalStrategy "
+                  f"'{self.resource_removal_strategy}', using 0.6")
+            rrs = 0.6
+        self.resource_removal_strategy = min(max(rrs, 0.0), 1.0)
+        # RRS as integer per-mille: the surplus ceiling becomes pure
+        # integer arithmetic per decision instead of a float multiply
+        # plus math.ceil
+        self.rrs_permille = int(round(self.resource_removal_strategy * 1000))
+
 @dataclass
 class ScalingDecision:
     action: str  # "scale_out", "scale_in", "no_action"
@@ -21,47 +49,47 @@ class ScalingDecision:
     reason: Optional[str] = None
     pods_surplus: Optional[int] = None
 
+@dataclass
+class _DeploymentState:
+    # Monotonic epoch of the last executed scaling, 0.0 = never scaled;
+    # cooldown math is one float subtraction against this. No decision
+    # history is kept here: nothing reads it, and an unbounded list per
+    # deployment would only invite leaks (use a bounded deque if a
+    # consumer ever appears).
+    last_scaling_time: float = 0.0
+
+
 class ScalingAlgorithm:
     def __init__(self):
-        self.last_scaling_time: Dict[str, datetime] = {}
-        self.scaling_history: Dict[str, list] = {}
-    
+        # One record per deployment: a single dict probe fetches all the
+        # per-deployment state the decision path needs, instead of the
+        # parallel last_scaling_time / scaling_history dicts
+        self._state: Dict[str, _DeploymentState] = {}
+
     def execute_scaling_decision(self, deployment_name: str, decision: ScalingDecision):
         try:
             if decision.action in ["scale_out", "scale_in"]:
-                self.last_scaling_time[deployment_name] = datetime.now()
+                state = self._state.get(deployment_name)
+                if state is None:
+                    state = self._state.setdefault(deployment_name, _DeploymentState())
+                state.last_scaling_time = time.monotonic()
                 return True
             return False
-            
+
         except Exception as e:
             return False
     
-    def _calculate_required_pods(self, predicted_workload: float, workload_per_pod: int):
-        if workload_per_pod <= 0:
-            return 1
-            
-        required_pods = math.ceil(predicted_workload / workload_per_pod)
-        
-        return max(1, required_pods)
-    
-    def _is_in_cooldown(self, deployment_name: str, cooldown_period: int):
-        if deployment_name not in self.last_scaling_time:
-            return False
-            
-        last_scaling = self.last_scaling_time[deployment_name]
-        cooldown_end = last_scaling + timedelta(seconds=cooldown_period)
-        
-        return datetime.now() < cooldown_end
-    
-    def _get_cooldown_remaining(self, deployment_name: str, cooldown_period: int) -> int:
-        if deployment_name not in self.last_scaling_time:
-            return 0
-            
-        last_scaling = self.last_scaling_time[deployment_name]
-        cooldown_end = last_scaling + timedelta(seconds=cooldown_period)
-        remaining = cooldown_end - datetime.now()
-        
-        return max(0, int(remaining.total_seconds()))
+    def _cooldown_status(self, deployment_name: str, cooldown_period: int):
+        # One clock read answers both "still cooling down?" and "for how
+        # long?"; the old split helpers each re-read the clock and built
+        # fresh timedelta objects on the branch hit every quiescent tick
+        state = self._state.get(deployment_name)
+        if state is None or state.last_scaling_time == 0.0:
+            return False, 0
+
+        remaining = state.last_scaling_time + cooldown_period - time.monotonic()
+
+        return remaining > 0, max(0, int(remaining))
     
     def calculate_scaling_decision(self,
                                    deployment_name: str,
@@ -70,65 +98,54 @@ class ScalingAlgorithm:
                                    config: ScalingConfig):
         try:
             # Check if we're in cooldown period (CDT)
-            if self._is_in_cooldown(deployment_name, config.cooldown_period):
-                cooldown_remaining = self._get_cooldown_remaining(deployment_name, config.cooldown_period)
+            in_cooldown, cooldown_remaining = self._cooldown_status(deployment_name, config.cooldown_period)
+            if in_cooldown:
                 return ScalingDecision(
                     action="no_action",
                     target_replicas=current_replicas,
                     current_replicas=current_replicas,
                     predicted_workload=predicted_workload,
-                    reason=f"In cooldown period, {cooldown_remaining}s remaining"
+                    reason=(f"In cooldown period, {cooldown_remaining}s remaining"
+                            if LOG_REASONS else None)
                 )
             
-            # Calculate required pods for next interval (pods_t+1)
-            pods_required = max(self._calculate_required_pods(predicted_workload, config.workload_per_pod), config.min_replicas)
-
-            # Apply Scaling Algorithm logic
-            if pods_required > current_replicas:
-                # Scale out scenario
-                target_replicas = min(pods_required, config.max_replicas)
-                decision = ScalingDecision(
-                    action="scale_out",
-                    target_replicas=target_replicas,
-                    current_replicas=current_replicas,
-                    predicted_workload=predicted_workload,
-                    reason=f"Predicted workload requires {pods_required} pods, scaling out to {target_replicas}"
-                )
-                
-            elif pods_required < current_replicas:
-                # Scale in scenario with RRS
-                # Step 1: Ensure we don't go below minimum
-                pods_adjusted = max(pods_required, config.min_replicas)
-                
-                # Step 2: Calculate surplus pods using RRS
-                pods_surplus = math.ceil((current_replicas - pods_adjusted) * config.resource_removal_strategy)
-                
-                # Step 3: Calculate final target replicas
-                target_replicas = current_replicas - pods_surplus
-                
-                # Ensure we don't go below minimum after RRS calculation
-                target_replicas = max(target_replicas, config.min_replicas)
-                
-                decision = ScalingDecision(
-                    action="scale_in",
-                    target_replicas=target_replicas,
-                    current_replicas=current_replicas,
-                    predicted_workload=predicted_workload,
-                    reason=f"Predicted workload requires {pods_required} pods, "
-                           f"RRS removing {pods_surplus} of {current_replicas - pods_adjusted} surplus pods",
-                    pods_surplus=pods_surplus
-                )
-                
+            # Required pods for next interval (pods_t+1), clamped into the
+            # allowed band in one pass; the old scale-out/in/no-op cascade
+            # rebuilt near-identical decisions in three separate branches.
+            # -(-a // b) is an exact ceiling without the math.ceil call.
+            pods_required = max(int(-(-predicted_workload // config.workload_per_pod)),
+                                config.min_replicas)
+            target_replicas = min(pods_required, config.max_replicas)
+
+            pods_surplus = None
+            if target_replicas < current_replicas:
+                # Scale in with RRS: only remove a fraction of the surplus,
+                # never dropping below the minimum. Integer per-mille RRS
+                # keeps the ceiling in integer arithmetic.
+                surplus_pool = current_replicas - target_replicas
+                pods_surplus = (surplus_pool * config.rrs_permille + 999) // 1000
+                target_replicas = max(current_replicas - pods_surplus, config.min_replicas)
+
+            delta = target_replicas - current_replicas
+            if delta > 0:
+                action = "scale_out"
+                reason = f"Predicted workload requires {pods_required} pods, scaling out to {target_replicas}"
+            elif delta < 0:
+                action = "scale_in"
+                reason = (f"Predicted workload requires {pods_required} pods, "
+                          f"RRS removing {pods_surplus} of {current_replicas - pods_required} surplus pods")
             else:
-                # No scaling needed
-                decision = ScalingDecision(
-                    action="no_action",
-                    target_replicas=current_replicas,
-                    current_replicas=current_replicas,
-                    predicted_workload=predicted_workload
-                )
-            
-            return decision
+                action = "no_action"
+                reason = None
+
+            return ScalingDecision(
+                action=action,
+                target_replicas=target_replicas,
+                current_replicas=current_replicas,
+                predicted_workload=predicted_workload,
+                reason=reason,
+                pods_surplus=pods_surplus
+            )
             
         except Exception as e:
             return ScalingDecision(
@@ -137,4 +154,54 @@ class ScalingAlgorithm:
                 current_replicas=current_replicas,
                 predicted_workload=predicted_workload,
                 reason=f"Error in scaling calculation: {e}"
-            )
\ No newline at end of file
+            )
+
+    def calculate_scaling_decisions_batch(self,
+                                          names: List[str],
+                                          predicted_workloads,
+                                          current_replicas,
+                                          configs: List[ScalingConfig]):
+        # Vectorized counterpart of calculate_scaling_decision for control
+        # loops driving many deployments: the clamp, RRS surplus and
+        # cooldown mask run as array ops, and only entries whose action
+        # actually changes replicas materialize a ScalingDecision.
+        # Returns {deployment_name: ScalingDecision}.
+        now = time.monotonic()
+
+        pw = np.asarray(predicted_workloads, dtype=np.float64)
+        cur = np.asarray(current_replicas, dtype=np.int64)
+        min_r = np.array([c.min_replicas for c in configs], dtype=np.int64)
+        max_r = np.array([c.max_replicas for c in configs], dtype=np.int64)
+        wpp = np.array([c.workload_per_pod for c in configs], dtype=np.int64)
+        rrs_permille = np.array([c.rrs_permille for c in configs], dtype=np.int64)
+        cdt = np.array([c.cooldown_period for c in configs], dtype=np.float64)
+
+        pods_required = np.maximum(np.ceil(pw / wpp).astype(np.int64), min_r)
+        target = np.minimum(pods_required, max_r)
+
+        scale_in = target < cur
+        surplus_pool = np.where(scale_in, cur - target, 0)
+        pods_surplus = (surplus_pool * rrs_permille + 999) // 1000
+        target = np.where(scale_in, np.maximum(cur - pods_surplus, min_r), target)
+
+        # Deployments still in cooldown are forced to no-op
+        last = np.array(
+            [self._state[name].last_scaling_time if name in self._state else 0.0
+             for name in names],
+            dtype=np.float64)
+        cooled = (last > 0.0) & (last + cdt > now)
+        target = np.where(cooled, cur, target)
+
+        decisions: Dict[str, ScalingDecision] = {}
+        delta = target - cur
+        for i in np.nonzero(delta)[0]:
+            d = int(delta[i])
+            decisions[names[i]] = ScalingDecision(
+                action="scale_out" if d > 0 else "scale_in",
+                target_replicas=int(target[i]),
+                current_replicas=int(cur[i]),
+                predicted_workload=float(pw[i]),
+                pods_surplus=int(pods_surplus[i]) if d < 0 else None
+            )
+
+        return decisions
\ No newline at end of file
@@ -1,15 +1,20 @@
 import os
 import asyncio
+import logging
 import signal
 import sys
 import time
+import traceback
 import csv
 from typing import Dict
 from datetime import datetime
 
+import numpy as np
+
 from kubernetes import client, config
 from kubernetes.client.rest import ApiException
-from kubernetes_asyncio import client as async_client, config as async_config
+from kubernetes_asyncio import client as async_client, config as async_config, watch as async_watch
+from kubernetes_asyncio.client.rest import ApiException as AsyncApiException
 
 from sklearn.preprocessing import MinMaxScaler
 
@@ -17,6 +22,10 @@ from helper.model_handler import ModelHandler, ValidationThresholds
 from helper.prometheus_client import PrometheusClient, QueryConfig
 from helper.scaling_algoirthm import ScalingAlgorithm, ScalingConfig
 
+# Routine per-cycle failures log a one-liner; full tracebacks only appear
+# at DEBUG so steady-state errors don't stall the loop on stdout writes
+log = logging.getLogger(__name__)
+
 
 class AIHorizontalPodAutoscaler:
     def __init__(self, namespace: str):
@@ -30,44 +39,99 @@ class AIHorizontalPodAutoscaler:
         self.scaling_algorithm = ScalingAlgorithm()
         
         # Kubernetes clients
+        self.api_client = None
         self.apps_v1 = None
         self.custom_objects_api = None
         self.using_async_client = False
-        
+
+        # Awaitable API wrappers, bound once in _bind_api_calls
+        self._read_deployment = None
+        self._patch_deployment = None
+        self._list_crds = None
+
         # Shutdown flag
         self.shutdown_event = asyncio.Event()
-        
+
+        # Cap concurrent per-deployment cycles to bound API-server pressure
+        self._process_semaphore = asyncio.Semaphore(16)
+
+        # CRD watch state (async client); the sync fallback still polls
+        self._crd_watch_task = None
+        self._crd_resource_version = None
+
+        # Deployment watch state: ready replicas served from a local cache
+        self._deployment_watch_task = None
+        self._deployment_resource_version = None
+        self._replica_cache: Dict[str, int] = {}
+
+        # Short-TTL Prometheus result cache: deployments that share a query
+        # (same service/window/template) within a cycle hit the same entry
+        # instead of re-issuing an identical range query
+        self._prom_cache: Dict[tuple, tuple] = {}
+        self._prom_cache_ttl = 30.0
+
         # Track last CRD reload time
         self.last_crd_reload = time.time()
         
-        # CSV logging setup
+        # CSV logging setup: the file is opened once and rows stream to it
+        # incrementally, so memory stays flat during long runs and a crash
+        # loses at most the last unflushed rows instead of everything
         self.csv_filename = f"autoscaler_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        self.csv_data = []  # Store data in memory until shutdown
+        self._csv_file = None
+        self._csv_writer = None
+        self._csv_rows_since_flush = 0
+
+        # Timestamp string cache: records logged within the same second
+        # (every deployment in a cycle) share one strftime call
+        self._last_ts = 0
+        self._last_str = ''
+
+    def _now_str(self):
+        """Current wall-clock time as 'YYYY-MM-DD HH:MM:SS', cached per second"""
+        now = int(time.time())
+        if now != self._last_ts:
+            self._last_ts = now
+            self._last_str = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now))
+        return self._last_str
 
     def _log_to_csv(self, deployment_name: str, current_replicas: int, current_request: float = None, predicted_request: float = None):
-        """Store deployment data in memory for later CSV export"""
+        """Append a deployment record to the CSV log"""
         try:
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            self.csv_data.append([
-                timestamp, 
-                deployment_name, 
-                current_replicas, 
+            if self._csv_writer is None:
+                self._csv_file = open(self.csv_filename, 'w', newline='',
+                                      buffering=1 << 16)
+                self._csv_writer = csv.writer(self._csv_file)
+                self._csv_writer.writerow(['timestamp', 'deployment_name', 'current_replicas', 'current_request', 'predicted_request'])
+
+            timestamp = self._now_str()
+            self._csv_writer.writerow([
+                timestamp,
+                deployment_name,
+                current_replicas,
                 current_request if current_request is not None else 'N/A',
                 predicted_request if predicted_request is not None else 'N/A'
             ])
+
+            # Flush in batches: one syscall per 32 rows instead of per record
+            self._csv_rows_since_flush += 1
+            if self._csv_rows_since_flush >= 32:
+                self._csv_file.flush()
+                self._csv_rows_since_flush = 0
         except Exception as e:
-            print(f"Failed to store CSV data: {e}")
+            print(f"Failed to write CSV data: {e}")
 
-    def _write_csv_file(self):
-        """Write all collected data to CSV file on shutdown"""
+    def _close_csv_file(self):
+        """Flush remaining rows and close the CSV log on shutdown"""
         try:
-            with open(self.csv_filename, 'w', newline='') as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow(['timestamp', 'deployment_name', 'current_replicas', 'current_request', 'predicted_request'])
-                writer.writerows(self.csv_data)
-            print(f"CSV file written: {self.csv_filename} with {len(self.csv_data)} records")
+            if self._csv_file is not None:
+                self._csv_file.flush()
+                os.fsync(self._csv_file.fileno())
+                self._csv_file.close()
+                self._csv_file = None
+                self._csv_writer = None
+                print(f"CSV file written: {self.csv_filename}")
         except Exception as e:
-            print(f"Failed to write CSV file: {e}")
+            print(f"Failed to close CSV file: {e}")
 
     # init 
     async def initialize(self):
@@ -89,7 +153,16 @@ class AIHorizontalPodAutoscaler:
             print("Loading CRD configurations...")
             await self._load_crd_configurations()
             print(f"Loaded {len(self.monitored_deployments)} CRD configurations")
-            
+
+            # Keep configurations fresh from watch events instead of
+            # re-LISTing every 10 minutes (async client only)
+            if self.using_async_client:
+                self._crd_watch_task = asyncio.create_task(self._watch_crd_configurations())
+                print("Started CRD watch")
+
+                self._deployment_watch_task = asyncio.create_task(self._watch_deployments())
+                print("Started Deployment watch")
+
         except Exception as e:
             raise Exception(f"Failed to initialize operator: {e}")
     
@@ -103,9 +176,15 @@ class AIHorizontalPodAutoscaler:
                 await async_config.load_kube_config()
                 print("Loaded kubeconfig (async)")
             
-            # Initialize async API clients
-            self.apps_v1 = async_client.AppsV1Api()
-            self.custom_objects_api = async_client.CustomObjectsApi()
+            # One shared ApiClient with a larger keep-alive pool: every API
+            # call reuses a warm connection to the apiserver instead of
+            # paying a TCP+TLS handshake, and concurrent per-deployment
+            # requests don't queue on the default small pool
+            configuration = async_client.Configuration.get_default_copy()
+            configuration.connection_pool_maxsize = 64
+            self.api_client = async_client.ApiClient(configuration=configuration)
+            self.apps_v1 = async_client.AppsV1Api(self.api_client)
+            self.custom_objects_api = async_client.CustomObjectsApi(self.api_client)
             self.using_async_client = True
             print("Using async Kubernetes client")
             
@@ -121,37 +200,76 @@ class AIHorizontalPodAutoscaler:
                     config.load_kube_config()
                     print("Loaded kubeconfig (sync)")
                 
-                self.apps_v1 = client.AppsV1Api()
-                self.custom_objects_api = client.CustomObjectsApi()
+                sync_configuration = client.Configuration.get_default_copy()
+                sync_configuration.connection_pool_maxsize = 64
+                self.api_client = client.ApiClient(configuration=sync_configuration)
+                self.apps_v1 = client.AppsV1Api(self.api_client)
+                self.custom_objects_api = client.CustomObjectsApi(self.api_client)
                 self.using_async_client = False
                 print("Using sync Kubernetes client")
             except Exception as sync_error:
                 raise Exception(f"Failed to initialize Kubernetes client: async={async_error}, sync={sync_error}")
 
-    # load CRD
-    async def _load_crd_configurations(self):
-        """Load CRD configurations with improved error handling"""
-        try:
-            # Get all AIHorizontalPodAutoscaler CRDs in the namespace
-            if self.using_async_client:
-                crds = await self.custom_objects_api.list_namespaced_custom_object(
+        self._bind_api_calls()
+
+    def _bind_api_calls(self):
+        """Bind awaitable API wrappers once at init
+
+        Hot paths call self._read_deployment / self._patch_deployment /
+        self._list_crds directly; the async-vs-executor decision is made
+        here exactly once instead of branching on every call.
+        """
+        if self.using_async_client:
+            async def read_deployment(name):
+                return await self.apps_v1.read_namespaced_deployment(
+                    name=name, namespace=self.namespace)
+
+            async def patch_deployment(name, body):
+                return await self.apps_v1.patch_namespaced_deployment(
+                    name=name, namespace=self.namespace, body=body)
+
+            async def list_crds():
+                return await self.custom_objects_api.list_namespaced_custom_object(
                     group="aiautoscaler.io",
                     version="v1",
                     namespace=self.namespace,
-                    plural="aihorizontalpodautoscalers"
-                )
-            else:
-                # Sync client - run in executor to avoid blocking
-                crds = await asyncio.get_event_loop().run_in_executor(
+                    plural="aihorizontalpodautoscalers")
+        else:
+            async def read_deployment(name):
+                return await asyncio.get_running_loop().run_in_executor(
+                    None,
+                    lambda: self.apps_v1.read_namespaced_deployment(
+                        name=name, namespace=self.namespace))
+
+            async def patch_deployment(name, body):
+                return await asyncio.get_running_loop().run_in_executor(
+                    None,
+                    lambda: self.apps_v1.patch_namespaced_deployment(
+                        name=name, namespace=self.namespace, body=body))
+
+            async def list_crds():
+                return await asyncio.get_running_loop().run_in_executor(
                     None,
                     lambda: self.custom_objects_api.list_namespaced_custom_object(
                         group="aiautoscaler.io",
                         version="v1",
                         namespace=self.namespace,
-                        plural="aihorizontalpodautoscalers"
-                    )
-                )
-            
+                        plural="aihorizontalpodautoscalers"))
+
+        self._read_deployment = read_deployment
+        self._patch_deployment = patch_deployment
+        self._list_crds = list_crds
+
+    # load CRD
+    async def _load_crd_configurations(self):
+        """Load CRD configurations with improved error handling"""
+        try:
+            # Get all AIHorizontalPodAutoscaler CRDs in the namespace
+            crds = await self._list_crds()
+
+            # Remember where the LIST left off so the watch resumes from here
+            self._crd_resource_version = crds.get('metadata', {}).get('resourceVersion')
+
             items = crds.get('items', [])
             if not items:
                 print(f"WARNING: No AIHorizontalPodAutoscaler CRDs found in namespace '{self.namespace}'")
@@ -183,6 +301,121 @@ class AIHorizontalPodAutoscaler:
         except Exception as e:
             raise Exception(f"Unexpected error loading CRD configurations: {e}")
 
+    async def _handle_crd_event(self, event: dict):
+        """Apply a single ADDED/MODIFIED/DELETED CRD watch event"""
+        event_type = event.get('type')
+        crd = event.get('object', {})
+
+        if event_type in ("ADDED", "MODIFIED"):
+            try:
+                await self._process_crd_configuration(crd)
+            except Exception as crd_error:
+                crd_name = crd.get('metadata', {}).get('name', 'unknown')
+                print(f"WARNING: Failed to process CRD '{crd_name}': {crd_error}")
+        elif event_type == "DELETED":
+            deployment_name = crd.get('spec', {}).get('targetDeployment')
+            if deployment_name in self.monitored_deployments:
+                del self.monitored_deployments[deployment_name]
+                print(f"Removed deployment '{deployment_name}' from monitoring (CRD deleted)")
+
+        resource_version = crd.get('metadata', {}).get('resourceVersion')
+        if resource_version:
+            self._crd_resource_version = resource_version
+
+    async def _watch_crd_configurations(self):
+        """Maintain monitored_deployments incrementally from a CRD watch"""
+        while not self.shutdown_event.is_set():
+            watch = async_watch.Watch()
+            try:
+                stream = watch.stream(
+                    self.custom_objects_api.list_namespaced_custom_object,
+                    group="aiautoscaler.io",
+                    version="v1",
+                    namespace=self.namespace,
+                    plural="aihorizontalpodautoscalers",
+                    resource_version=self._crd_resource_version,
+                    timeout_seconds=600
+                )
+                async for event in stream:
+                    await self._handle_crd_event(event)
+                    if self.shutdown_event.is_set():
+                        break
+
+            except AsyncApiException as e:
+                if e.status == 410:
+                    # Watch history expired; re-list to reseed state
+                    print("CRD watch expired (410 Gone), re-listing...")
+                    self._crd_resource_version = None
+                    await self._reload_crd_configurations()
+                else:
+                    print(f"CRD watch API error (status {e.status}): {e.reason}")
+                    await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"CRD watch error: {e}")
+                await asyncio.sleep(5)
+            finally:
+                watch.stop()
+
+    async def _watch_deployments(self):
+        """Keep a local ready-replica cache fed by one Deployment watch"""
+        while not self.shutdown_event.is_set():
+            try:
+                # (Re)seed the cache and capture the LIST resourceVersion
+                deployments = await self.apps_v1.list_namespaced_deployment(
+                    namespace=self.namespace
+                )
+                self._deployment_resource_version = deployments.metadata.resource_version
+
+                for deployment in deployments.items:
+                    self._replica_cache[deployment.metadata.name] = \
+                        deployment.status.ready_replicas or 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Deployment list error: {e}")
+                await asyncio.sleep(5)
+                continue
+
+            watch = async_watch.Watch()
+            try:
+                stream = watch.stream(
+                    self.apps_v1.list_namespaced_deployment,
+                    namespace=self.namespace,
+                    resource_version=self._deployment_resource_version,
+                    timeout_seconds=600
+                )
+                async for event in stream:
+                    deployment = event['object']
+                    name = deployment.metadata.name
+
+                    if event['type'] == 'DELETED':
+                        self._replica_cache.pop(name, None)
+                    else:
+                        self._replica_cache[name] = deployment.status.ready_replicas or 0
+
+                    if deployment.metadata.resource_version:
+                        self._deployment_resource_version = deployment.metadata.resource_version
+
+                    if self.shutdown_event.is_set():
+                        break
+
+            except AsyncApiException as e:
+                if e.status == 410:
+                    print("Deployment watch expired (410 Gone), re-listing...")
+                    self._deployment_resource_version = None
+                else:
+                    print(f"Deployment watch API error (status {e.status}): {e.reason}")
+                    await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Deployment watch error: {e}")
+                await asyncio.sleep(5)
+            finally:
+                watch.stop()
+
     async def _reload_crd_configurations(self):
         """Reload CRD configurations with error handling"""
         try:
@@ -223,26 +456,45 @@ class AIHorizontalPodAutoscaler:
                 query_template=prometheus_config.get('queryTemplate', 'rate(http_requests_total{{service="{service_name}"}}[{window}m])')
             )
 
+            # Render the PromQL once here instead of re-formatting the
+            # template on every fetch; a bad template surfaces at load time
+            try:
+                query_config.rendered_query = query_config.query_template.format(
+                    service=query_config.service_name)
+            except (KeyError, IndexError) as e:
+                print(f"WARNING: Could not pre-render query template for '{crd_name}': {e}")
+
             # Extract and validate scaling config
             scaling_cfg = spec.get('scalingConfig', {})
             scaling_config = ScalingConfig(
                 min_replicas=scaling_cfg.get('minReplicas', 1),
                 max_replicas=scaling_cfg.get('maxReplicas', 10),
                 workload_per_pod=scaling_cfg.get('workloadPerPod', 100),
-                resource_removal_strategy=scaling_cfg.get('resourceRemovalStrategy', 'gradual'),
+                resource_removal_strategy=scaling_cfg.get('resourceRemovalStrategy', 0.6),
                 cooldown_period=scaling_cfg.get('cooldownPeriod', 300)
             )
 
             print(f"Loaded CRD '{crd_name}' for deployment '{deployment_name}'")
             
+            # Query parameters may have changed; drop any cached results
+            self._prom_cache.clear()
+
             # Store configuration
             self.monitored_deployments[deployment_name] = {
                 'crd_name': crd_name,
                 'thresholds': thresholds,
                 'query_config': query_config,
                 'scaling_config': scaling_config,
+                # One scaler per deployment, fit on first use; constructing
+                # (and refitting) one per prediction threw away the stats the
+                # inverse transform depends on
+                'scaler': MinMaxScaler(feature_range=(-1, 1)),
                 'last_processed': None,
-                'error_count': 0
+                'error_count': 0,
+                # Monotonic timestamp before which this deployment is
+                # skipped; pushed out exponentially on failures so a broken
+                # deployment doesn't burn API/Prometheus calls every cycle
+                'next_eligible_ts': 0.0
             }
             
         except (ValueError, KeyError) as e:
@@ -252,21 +504,15 @@ class AIHorizontalPodAutoscaler:
     
     async def _get_current_replicas(self, deployment_name: str):
         """Get current replica count with error handling"""
+        # Served from the watch-fed cache when running: one dict lookup
+        # instead of a GET round-trip per deployment per cycle
+        if self._deployment_watch_task is not None:
+            cached = self._replica_cache.get(deployment_name)
+            if cached is not None:
+                return cached
+
         try:
-            if self.using_async_client:
-                deployment = await self.apps_v1.read_namespaced_deployment(
-                    name=deployment_name,
-                    namespace=self.namespace
-                )
-            else:
-                # Sync client - run in executor
-                deployment = await asyncio.get_event_loop().run_in_executor(
-                    None,
-                    lambda: self.apps_v1.read_namespaced_deployment(
-                        name=deployment_name,
-                        namespace=self.namespace
-                    )
-                )
+            deployment = await self._read_deployment(deployment_name)
             return deployment.status.ready_replicas or 0
             
         except ApiException as e:
@@ -282,45 +528,61 @@ class AIHorizontalPodAutoscaler:
     async def _get_historical_metrics(self, query_config: QueryConfig):
         """Get historical metrics with error handling"""
         try:
-            metrics = self.prometheus_client.get_historical_workload(query_config)
-            
+            cache_key = (query_config.service_name,
+                         query_config.window_minutes,
+                         query_config.query_template)
+            cached = self._prom_cache.get(cache_key)
+            if cached is not None:
+                cached_at, cached_metrics = cached
+                if time.monotonic() - cached_at < self._prom_cache_ttl:
+                    return cached_metrics
+                del self._prom_cache[cache_key]
+
+            # Awaited, so all per-deployment scrapes in a cycle overlap on
+            # the event loop instead of blocking it for a full HTTP RTT each
+            metrics = await self.prometheus_client.get_historical_workload_async(query_config)
+
             if not metrics:
                 print(f"WARNING: No metrics returned from Prometheus for service '{query_config.service_name}'")
                 return None
-            
+
+            self._prom_cache[cache_key] = (time.monotonic(), metrics)
+
             return metrics
             
         except Exception as e:
             print(f"Error getting historical metrics for '{query_config.service_name}': {e}")
             return None
     
-    async def _make_prediction(self, historical_data: list, thresholds: ValidationThresholds):
+    async def _make_prediction(self, historical_data: list, thresholds: ValidationThresholds, scaler: MinMaxScaler):
         """Make prediction with data validation"""
         try:
-            # Ensure we have exactly 10 data points
-            if len(historical_data) != 10:
-                # Pad or truncate as needed
-                if len(historical_data) < 10:
-                    # Pad with last known value or zero
-                    last_value = historical_data[-1] if historical_data else 0
-                    historical_data.extend([last_value] * (10 - len(historical_data)))
-                    print(f"  - Padded historical data to 10 points (was {len(historical_data)})")
-                else:
-                    # Take last 10 points
-                    historical_data = historical_data[-10:]
-                    print(f"  - Truncated historical data to 10 points (was {len(historical_data)})")
+            # Exactly 10 points in one pre-sized float32 buffer: the tail of
+            # the window fills the back, short windows left-pad with the
+            # oldest available value. No list extend/slice or per-element
+            # boxing, and the scaler/model consume the array as-is.
+            window = np.empty((10, 1), dtype=np.float32)
+            n = min(len(historical_data), 10)
+            if n:
+                window[-n:] = np.asarray(
+                    historical_data[-n:], dtype=np.float32).reshape(n, 1)
+                if n < 10:
+                    window[:-n] = window[-n]
+                    log.debug("Padded historical data to 10 points (was %d)", n)
+            else:
+                window[:] = 0.0
+
+            # Inference holds the GIL for tens of ms depending on backend;
+            # run it on a worker thread so K8s/Prometheus I/O for the other
+            # deployments keeps overlapping on the event loop
+            prediction = await asyncio.to_thread(
+                self.model_handler.predict, window, scaler, thresholds)
 
-            scaler = MinMaxScaler(feature_range=(-1, 1))
-            
-            # Make prediction
-            prediction = self.model_handler.predict(historical_data, scaler, thresholds)
-            
             return prediction
             
         except Exception as e:
-            print(f"Error making prediction: {e}")
-            import traceback
-            traceback.print_exc()
+            log.warning("Error making prediction: %s", e)
+            log.debug("Prediction failure traceback", exc_info=True)
             return None
     
     async def _execute_scaling(self, deployment_name: str, scaling_decision):
@@ -333,23 +595,8 @@ class AIHorizontalPodAutoscaler:
                 }
             }
             
-            if self.using_async_client:
-                await self.apps_v1.patch_namespaced_deployment(
-                    name=deployment_name,
-                    namespace=self.namespace,
-                    body=body
-                )
-            else:
-                # Sync client - run in executor
-                await asyncio.get_event_loop().run_in_executor(
-                    None,
-                    lambda: self.apps_v1.patch_namespaced_deployment(
-                        name=deployment_name,
-                        namespace=self.namespace,
-                        body=body
-                    )
-                )
-            
+            await self._patch_deployment(deployment_name, body)
+
             print(f"  ✓ Successfully scaled {deployment_name} to {scaling_decision.target_replicas} replicas")
             return True
             
@@ -368,51 +615,45 @@ class AIHorizontalPodAutoscaler:
     async def _process_deployment(self, deployment_name: str, config: dict):
         """Process a single deployment with comprehensive error handling"""
         try:
-            print(f"\n{'='*60}")
-            print(f"Processing deployment: {deployment_name}")
-            print(f"{'='*60}")
-            
+            # One structured record per deployment per cycle; the old
+            # multi-line banner (15 stdout writes per deployment) serialized
+            # the concurrent cycles on stdout's lock
+            log.debug("Processing deployment: %s", deployment_name)
+
             # Get current deployment status
             current_replicas = await self._get_current_replicas(deployment_name)
             if current_replicas is None:
-                print(f"  ✗ Failed to get current replicas for {deployment_name}")
+                log.warning("Failed to get current replicas for %s", deployment_name)
                 config['error_count'] += 1
                 return
-            
-            print(f"  • Current replicas: {current_replicas}")
-            
+
             # Get historical metrics from Prometheus
             historical_data = await self._get_historical_metrics(config['query_config'])
-            
+
             if not historical_data:
-                print(f"  ✗ No historical data available for {deployment_name}")
+                log.warning("No historical data available for %s", deployment_name)
                 # Log with basic info if no historical data
                 self._log_to_csv(deployment_name, current_replicas)
                 config['error_count'] += 1
                 return
-            
-            print(f"  • Historical data points: {len(historical_data)}")
-            
+
             # Extract current request (last value from historical data)
             current_request = historical_data[-1] if historical_data else None
             current_request_value = current_request[0] if current_request else None
-            print(f"  • Current request rate: {current_request_value}")
-            
+
             # Make AI prediction
-            predicted_workload = await self._make_prediction(historical_data, config['thresholds'])
-            
+            predicted_workload = await self._make_prediction(historical_data, config['thresholds'], config['scaler'])
+
             if predicted_workload is None:
-                print(f"  ✗ Failed to make prediction for {deployment_name}")
+                log.warning("Failed to make prediction for %s", deployment_name)
                 # Still log the current state
                 self._log_to_csv(deployment_name, current_replicas, current_request_value)
                 config['error_count'] += 1
                 return
-            
-            print(f"  • Predicted workload: {predicted_workload:.2f}")
-            
+
             # Log current state to CSV with request information
             self._log_to_csv(deployment_name, current_replicas, current_request_value, predicted_workload)
-            
+
             # Calculate scaling decision
             scaling_decision = self.scaling_algorithm.calculate_scaling_decision(
                 deployment_name,
@@ -420,14 +661,15 @@ class AIHorizontalPodAutoscaler:
                 current_replicas,
                 config['scaling_config']
             )
-            
-            print(f"  • Scaling decision: {scaling_decision.action}")
-            print(f"  • Target replicas: {scaling_decision.target_replicas}")
-            print(f"  • Reason: {scaling_decision.reason}")
-            
+
+            log.info("dep=%s curr=%d req=%s pred=%.2f action=%s target=%d",
+                     deployment_name, current_replicas, current_request_value,
+                     predicted_workload, scaling_decision.action,
+                     scaling_decision.target_replicas)
+            log.debug("dep=%s reason=%s", deployment_name, scaling_decision.reason)
+
             # Execute scaling if needed
             if scaling_decision.action in ["scale_out", "scale_in"]:
-                print(f"  → Executing scaling action: {scaling_decision.action}")
                 success = await self._execute_scaling(deployment_name, scaling_decision)
                 if success:
                     self.scaling_algorithm.execute_scaling_decision(deployment_name, scaling_decision)
@@ -436,18 +678,37 @@ class AIHorizontalPodAutoscaler:
                 else:
                     config['error_count'] += 1
             else:
-                print(f"  → No scaling action needed")
                 # Reset error count on successful processing even if no scaling
                 config['error_count'] = 0
-            
+
             config['last_processed'] = datetime.now()
             
         except Exception as e:
-            print(f"  ✗ Error processing deployment {deployment_name}: {e}")
-            import traceback
-            traceback.print_exc()
+            log.warning("Error processing deployment %s: %s", deployment_name, e)
+            log.debug("Deployment processing traceback", exc_info=True)
             config['error_count'] += 1
 
+    async def _process_deployment_guarded(self, deployment_name: str, config: dict):
+        """Run one deployment cycle without letting a failure cancel siblings"""
+        async with self._process_semaphore:
+            errors_before = config['error_count']
+            try:
+                await self._process_deployment(deployment_name, config)
+            except Exception as e:
+                log.warning("Critical error processing deployment %s: %s", deployment_name, e)
+                log.debug("Deployment guard traceback", exc_info=True)
+                config['error_count'] += 1
+
+            # Exponential backoff per deployment: failures push the next
+            # attempt out up to 15 minutes; any clean cycle clears it
+            if config['error_count'] > errors_before:
+                backoff = min(60 * 2 ** config['error_count'], 900)
+                config['next_eligible_ts'] = time.monotonic() + backoff
+                log.debug("dep=%s backing off %ds after %d errors",
+                          deployment_name, backoff, config['error_count'])
+            else:
+                config['next_eligible_ts'] = 0.0
+
     def _setup_signal_handlers(self):
         """Setup signal handlers for graceful shutdown"""
         def signal_handler(signum, frame):
@@ -482,48 +743,65 @@ class AIHorizontalPodAutoscaler:
                 loop_count += 1
                 loop_start_time = time.time()
                 
-                print(f"\n{'#'*60}")
-                print(f"# Loop {loop_count} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                print(f"# Monitoring {len(self.monitored_deployments)} deployments")
-                print(f"{'#'*60}")
-                
-                # Process each monitored deployment
-                # Create a copy of keys to avoid modification during iteration
-                deployment_names = list(self.monitored_deployments.keys())
-                
-                if not deployment_names:
-                    print("WARNING: No deployments to monitor. Waiting for CRD configurations...")
-                
-                for deployment_name in deployment_names:
-                    if deployment_name not in self.monitored_deployments:
-                        continue  # Skip if already removed
-                        
-                    config = self.monitored_deployments[deployment_name]
-                    
-                    try:
-                        await self._process_deployment(deployment_name, config)
-                    except Exception as e:
-                        print(f"✗ Critical error processing deployment {deployment_name}: {e}")
-                        import traceback
-                        traceback.print_exc()
-                        config['error_count'] += 1
-                    
-                    # Remove deployment if too many consecutive errors
-                    if config['error_count'] > 10:
-                        print(f"\n{'!'*60}")
-                        print(f"! WARNING: Removing deployment '{deployment_name}' from monitoring")
-                        print(f"! Reason: {config['error_count']} consecutive errors")
-                        print(f"{'!'*60}\n")
+                log.info("loop=%d deployments=%d", loop_count,
+                         len(self.monitored_deployments))
+
+                # Process each monitored deployment. One items() snapshot
+                # pins both name and config for the whole cycle: no per-name
+                # dict lookups or membership rechecks, and CRD watch updates
+                # landing mid-cycle can't change the set underneath us
+                snapshot = list(self.monitored_deployments.items())
+
+                if not snapshot:
+                    log.warning("No deployments to monitor. Waiting for CRD configurations...")
+
+                # Prefetch one Prometheus query per unique (service, window,
+                # template) group; deployments sharing a query then hit the
+                # TTL cache instead of racing duplicate HTTP requests
+                unique_queries = {}
+                for _, config in snapshot:
+                    qc = config['query_config']
+                    unique_queries.setdefault(
+                        (qc.service_name, qc.window_minutes, qc.query_template), qc)
+                if len(unique_queries) < len(snapshot):
+                    await asyncio.gather(
+                        *[self._get_historical_metrics(qc)
+                          for qc in unique_queries.values()],
+                        return_exceptions=True
+                    )
+
+                # Each deployment has independent Prometheus and K8s I/O, so
+                # run them concurrently: cycle time becomes the slowest
+                # deployment instead of the sum of all of them. Deployments
+                # still backing off after failures are skipped, so during a
+                # partial outage the healthy ones keep their cadence
+                now = time.monotonic()
+                await asyncio.gather(
+                    *[
+                        self._process_deployment_guarded(name, config)
+                        for name, config in snapshot
+                        if now >= config.get('next_eligible_ts', 0.0)
+                    ],
+                    return_exceptions=True
+                )
+
+                # Remove deployments with too many consecutive errors
+                for deployment_name, config in snapshot:
+                    if config['error_count'] > 10 and deployment_name in self.monitored_deployments:
+                        log.warning("Removing deployment '%s' from monitoring: %d consecutive errors",
+                                    deployment_name, config['error_count'])
                         del self.monitored_deployments[deployment_name]
                 
-                # Reload CRD configurations periodically (every 10 minutes)
-                current_time = time.time()
-                if current_time - self.last_crd_reload >= 600:  # 10 minutes
-                    try:
-                        await self._reload_crd_configurations()
-                        self.last_crd_reload = current_time
-                    except Exception as e:
-                        print(f"WARNING: Failed to reload CRD configurations: {e}")
+                # Periodic reload is only needed on the sync fallback; with
+                # the async client the CRD watch keeps state fresh
+                if self._crd_watch_task is None:
+                    current_time = time.time()
+                    if current_time - self.last_crd_reload >= 600:  # 10 minutes
+                        try:
+                            await self._reload_crd_configurations()
+                            self.last_crd_reload = current_time
+                        except Exception as e:
+                            print(f"WARNING: Failed to reload CRD configurations: {e}")
                 
                 # Calculate sleep time to maintain 1-minute intervals
                 loop_duration = time.time() - loop_start_time
@@ -542,7 +820,6 @@ class AIHorizontalPodAutoscaler:
             print(f"\n{'!'*60}")
             print(f"! CRITICAL ERROR in main loop: {e}")
             print(f"{'!'*60}\n")
-            import traceback
             traceback.print_exc()
             raise
 
@@ -554,23 +831,36 @@ class AIHorizontalPodAutoscaler:
         
         self.running = False
         self.shutdown_event.set()
-        
-        # Write CSV file before shutdown
+
+        # Stop the watch tasks
+        for watch_task in (self._crd_watch_task, self._deployment_watch_task):
+            if watch_task is not None:
+                watch_task.cancel()
+                try:
+                    await watch_task
+                except (asyncio.CancelledError, Exception):
+                    pass
+
+        # Flush and close the CSV log before shutdown
+        try:
+            print("Closing CSV log file...")
+            self._close_csv_file()
+        except Exception as e:
+            print(f"Error closing CSV file: {e}")
+
+        # Close the Prometheus client's aiohttp session
         try:
-            print("Writing CSV log file...")
-            self._write_csv_file()
+            if self.prometheus_client is not None:
+                await self.prometheus_client.close()
         except Exception as e:
-            print(f"Error writing CSV file: {e}")
+            print(f"Warning: Error closing Prometheus client: {e}")
         
-        # Close Kubernetes API clients properly
+        # Close the shared Kubernetes API client properly
         try:
-            if self.using_async_client:
-                print("Closing async Kubernetes API clients...")
-                if self.apps_v1 and hasattr(self.apps_v1, 'api_client'):
-                    await self.apps_v1.api_client.close()
-                if self.custom_objects_api and hasattr(self.custom_objects_api, 'api_client'):
-                    await self.custom_objects_api.api_client.close()
-                print("Async clients closed successfully")
+            if self.using_async_client and self.api_client is not None:
+                print("Closing async Kubernetes API client...")
+                await self.api_client.close()
+                print("Async client closed successfully")
         except Exception as e:
             print(f"Warning: Error closing API clients: {e}")
         
@@ -580,7 +870,14 @@ class AIHorizontalPodAutoscaler:
 async def main():
     namespace = "test-autoscaler"
     operator = None
-    
+
+    # DEBUG (set AUTOSCALER_DEBUG=1) re-enables full tracebacks
+    logging.basicConfig(
+        level=logging.DEBUG if os.environ.get('AUTOSCALER_DEBUG') else logging.INFO,
+        stream=sys.stderr,
+        format='%(asctime)s %(levelname)s %(message)s'
+    )
+
     print("="*60)
     print("AIHorizontalPodAutoscaler Starting")
     print(f"Namespace: {namespace}")
@@ -603,7 +900,6 @@ async def main():
         print("\n" + "!"*60)
         print(f"! Operator failed: {e}")
         print("!"*60 + "\n")
-        import traceback
         traceback.print_exc()
     finally:
         # ALWAYS ensure shutdown is called
@@ -613,11 +909,11 @@ async def main():
                 await operator.shutdown()
             except Exception as cleanup_error:
                 print(f"Error during cleanup: {cleanup_error}")
-                # Still try to write CSV even if other cleanup fails
+                # Still try to flush the CSV even if other cleanup fails
                 try:
-                    operator._write_csv_file()
+                    operator._close_csv_file()
                 except Exception as csv_error:
-                    print(f"Error writing CSV during emergency cleanup: {csv_error}")
+                    print(f"Error closing CSV during emergency cleanup: {csv_error}")
 
 if __name__ == "__main__":
     exit_code = 0
@@ -628,7 +924,6 @@ if __name__ == "__main__":
         exit_code = 0
     except Exception as e:
         print(f"\nFatal error: {e}")
-        import traceback
         traceback.print_exc()
         exit_code = 1
     finally:
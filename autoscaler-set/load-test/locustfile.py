@@ -1,11 +1,14 @@
+import array
+import atexit
 import csv
 import math
 import random
 import threading
 import time
-from collections import defaultdict
 from datetime import datetime
 
+import numpy as np
+
 from locust import HttpUser, LoadTestShape, between, events, task
 
 RANDOM_SEED = 42
@@ -13,6 +16,13 @@ random.seed(RANDOM_SEED)
 
 print(f"Using random seed: {RANDOM_SEED} (patterns will be reproducible)")
 
+# Ring-buffer slots for the tracker's minute buckets; the logger trails
+# recording by at most a couple of minutes, so 16 slots leave ample slack
+ROLLOVER = 16
+
+# Seconds of load schedule precomputed up front (24 hours)
+MAX_SECONDS = 1440 * 60
+
 
 class RequestTracker:
     """
@@ -25,41 +35,46 @@ class RequestTracker:
     def __init__(self):
         """
         Initialize RequestTracker with default values.
-        
+
         Creates a new CSV file with timestamp and sets up tracking structures
         for counting requests per minute.
         """
-        self.request_counts = defaultdict(int)
+        # Fixed ring of minute buckets; a GIL-atomic += on an array slot
+        # replaces the per-request lock, and reusing slots keeps memory
+        # constant however long the test runs
+        self.request_counts = array.array('q', [0] * ROLLOVER)
         self.start_time = None
+        self.start_ns = None
+        # Only taken briefly while log_minute_data snapshots finished
+        # buckets; record_request never acquires it
         self.lock = threading.Lock()
         self.csv_filename = f"requests_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
         self.last_logged_minute = -1
-        
+
+        # One handle and writer for the tracker's lifetime: no per-flush
+        # open/close churn, and the header goes out immediately
+        self._csv_file = open(self.csv_filename, 'w', newline='', buffering=1 << 16)
+        self._csv_writer = csv.writer(self._csv_file)
+        self._csv_writer.writerow(['Timestamp', 'Requests_Per_Minute'])
+        atexit.register(self._csv_file.close)
+
     def record_request(self):
         """
         Record a single request in the current minute bucket.
-        
+
         Initializes start_time on first request and increments the counter
-        for the current minute mark.
+        for the current minute mark. Lock-free: the integer increment on an
+        array slot is atomic under the GIL.
         """
-        if self.start_time is None:
+        if self.start_ns is None:
+            self.start_ns = time.monotonic_ns()
             self.start_time = time.time()
-            
-        current_time = time.time()
-        minute_mark = int((current_time - self.start_time) // 60)
-        
-        with self.lock:
-            self.request_counts[minute_mark] += 1
-    
-    def initialize_csv(self):
-        """
-        Create CSV file and write header row.
-        
-        Sets up the CSV file with columns for timestamp and requests per minute.
-        """
-        with open(self.csv_filename, 'w', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(['Timestamp', 'Requests_Per_Minute'])
+
+        # Integer nanoseconds end to end: no float conversion or datetime
+        # objects in the per-request path
+        minute_mark = (time.monotonic_ns() - self.start_ns) // 60_000_000_000
+
+        self.request_counts[minute_mark % ROLLOVER] += 1
     
     def log_minute_data(self):
         """
@@ -68,24 +83,39 @@ class RequestTracker:
         Writes request counts for each completed minute to the CSV file with
         corresponding timestamps. Prints confirmation for each logged minute.
         """
-        if self.start_time is None:
+        if self.start_ns is None:
             return
-            
-        current_time = time.time()
-        current_minute = int((current_time - self.start_time) // 60)
-        
+
+        current_minute = (time.monotonic_ns() - self.start_ns) // 60_000_000_000
+
+        # Snapshot finished buckets under a brief lock and zero each slot
+        # for its next lap around the ring; file I/O happens outside the
+        # lock so recording threads are never blocked on disk
         with self.lock:
-            for minute_to_log in range(self.last_logged_minute + 1, current_minute):
-                requests_this_minute = self.request_counts[minute_to_log]
-                minute_timestamp = datetime.fromtimestamp(self.start_time + minute_to_log * 60)
-                timestamp_str = minute_timestamp.strftime('%Y-%m-%d %H:%M:%S')
-                
-                with open(self.csv_filename, 'a', newline='') as csvfile:
-                    writer = csv.writer(csvfile)
-                    writer.writerow([timestamp_str, requests_this_minute])
-                
-                self.last_logged_minute = minute_to_log
-                print(f"Logged minute {minute_to_log}: {requests_this_minute} requests")
+            first_minute = self.last_logged_minute + 1
+            snapshot = []
+            for minute in range(first_minute, current_minute):
+                slot = minute % ROLLOVER
+                snapshot.append(self.request_counts[slot])
+                self.request_counts[slot] = 0
+
+        if not snapshot:
+            return
+
+        # One writerows per flush on the long-lived handle instead of an
+        # open/close pair and writer construction per logged minute
+        rows = [
+            (f"{datetime.fromtimestamp(self.start_time + (first_minute + offset) * 60):%Y-%m-%d %H:%M:%S}",
+             requests_this_minute)
+            for offset, requests_this_minute in enumerate(snapshot)
+        ]
+
+        self._csv_writer.writerows(rows)
+        self._csv_file.flush()
+
+        self.last_logged_minute = first_minute + len(snapshot) - 1
+        print(f"Logged minutes {first_minute}-{self.last_logged_minute} "
+              f"({sum(snapshot)} requests)")
 
 
 tracker = RequestTracker()
@@ -98,20 +128,23 @@ def on_request(request_type, name, response_time, response_length, response,
     tracker.record_request()
 
 
-@events.test_start.add_listener
-def on_test_start(environment, **kwargs):
-    """Initialize CSV file when test starts."""
-    tracker.initialize_csv()
-
-
 def csv_logger():
     """
     Background thread function for periodic CSV logging.
-    
-    Runs continuously, logging completed minute data every 60 seconds.
+
+    Waits for the first recorded request, then sleeps until just past
+    each minute boundary of the tracker's own clock so every flush covers
+    exactly the minutes that have completed. The old fixed 60s sleep
+    started a full period before the first request and drifted off the
+    tracker's minute grid.
     """
     while True:
-        time.sleep(60)
+        if tracker.start_time is None:
+            time.sleep(1)
+            continue
+
+        next_boundary = tracker.start_time + (tracker.last_logged_minute + 2) * 60
+        time.sleep(max(0.5, next_boundary - time.time()))
         tracker.log_minute_data()
 
 
@@ -157,27 +190,56 @@ class MyLoadShape(LoadTestShape):
         self.max_users = 150
         self.wave_length = 180
         self.random_factor = 0.2
-        
+
+        # With a fixed wave length only wave_length distinct sine values
+        # exist, so the per-tick transcendental becomes a table lookup
+        self._sin_lut = [math.sin(2 * math.pi * t / self.wave_length)
+                         for t in range(self.wave_length)]
+        self._span = self.max_users - self.min_users
+        # uniform(-r, r) is just a scaled random(); precomputing the
+        # amplitude keeps the per-tick noise to one call and one multiply
+        self._noise_amp = 2 * self.random_factor
+        # Dedicated generator so the noise stream stays reproducible
+        # regardless of other random consumers in the process
+        self._rng = random.Random(RANDOM_SEED)
+
+        # The schedule is deterministic given the seed, so the whole
+        # (user_count, spawn_rate) timeline is computed vectorized once;
+        # tick collapses to an array index
+        t = np.arange(MAX_SECONDS)
+        base = np.sin(2 * np.pi * t / self.wave_length)
+        noise = np.random.default_rng(RANDOM_SEED).uniform(
+            -self.random_factor, self.random_factor, MAX_SECONDS)
+        normalized = np.clip((base + noise + 1) / 2, 0, 1)
+        users = (self.min_users + self._span * normalized).astype(np.int32)
+        spawn = np.maximum(1, users // 10)
+        self._schedule = np.stack([users, spawn], axis=1)
+
     def tick(self):
         """
         Calculate user count and spawn rate for current time.
-        
-        Combines sinusoidal wave with random noise to determine the number
-        of users. Spawn rate is calculated as 10% of target user count.
-        
+
+        Indexes the precomputed schedule by elapsed second; past the
+        precomputed horizon it falls back to the table-driven wave with
+        random noise. Spawn rate is 10% of target user count.
+
         Returns:
             tuple: (user_count, spawn_rate) for this tick
         """
-        run_time = self.get_run_time()
-        
-        base_wave = math.sin(2 * math.pi * run_time / self.wave_length)
-        random_noise = random.uniform(-self.random_factor, self.random_factor)
+        run_time = int(self.get_run_time())
+
+        if run_time < MAX_SECONDS:
+            user_count, spawn_rate = self._schedule[run_time]
+            return (int(user_count), int(spawn_rate))
+
+        base_wave = self._sin_lut[run_time % self.wave_length]
+        random_noise = (self._rng.random() - 0.5) * self._noise_amp
         wave_with_noise = base_wave + random_noise
-        
+
         normalized = (wave_with_noise + 1) / 2
         normalized = max(0, min(1, normalized))
-        
-        user_count = int(self.min_users + (self.max_users - self.min_users) * normalized)
+
+        user_count = int(self.min_users + self._span * normalized)
         spawn_rate = max(1, user_count // 10)
-        
+
         return (user_count, spawn_rate)
\ No newline at end of file
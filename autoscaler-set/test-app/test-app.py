@@ -1,4 +1,4 @@
-from flask import Flask, jsonify, Response, request
+from flask import Flask, Response, g, request
 from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
 import time
 
@@ -15,36 +15,66 @@ REQUEST_DURATION = Histogram(
     ['method', 'endpoint']
 )
 
+# Child metrics cached per label tuple: .labels() does a dict lookup under
+# the library's lock on every call, so the hot path resolves each child
+# once and increments it directly afterwards
+_count_cache = {}
+_duration_cache = {}
+
+# The route/method/status space is tiny and known, so the usual children
+# are resolved at import time; after the warmup even the first request per
+# label combination skips .labels() entirely
+for _method in ('GET', 'POST'):
+    for _endpoint in ('home', 'unknown'):
+        for _status in (200, 404, 500):
+            _key = (_method, _endpoint, _status)
+            _count_cache[_key] = REQUEST_COUNT.labels(*_key)
+        _duration_cache[(_method, _endpoint)] = \
+            REQUEST_DURATION.labels(_method, _endpoint)
+
 
 @app.before_request
 def before_request():
-    app.start_time = time.time()
+    # flask.g is per-request; the old app.start_time attribute was shared
+    # across concurrent requests and produced bogus durations
+    g.start_ns = time.perf_counter_ns()
 
 
 @app.after_request
 def after_request(response):
-    duration = time.time() - app.start_time
-    
-    REQUEST_COUNT.labels(
-        method=request.method,
-        endpoint=request.endpoint or 'unknown',
-        status=response.status_code
-    ).inc()
-    
-    REQUEST_DURATION.labels(
-        method=request.method,
-        endpoint=request.endpoint or 'unknown'
-    ).observe(duration)
-    
+    # Don't instrument the scrape endpoint itself: scrape latency would
+    # dominate the histogram's tail and skew the workload it measures
+    if request.endpoint == 'metrics':
+        return response
+
+    # Integer clock read and subtraction; the only float op is the final
+    # seconds conversion for the histogram
+    duration = (time.perf_counter_ns() - g.start_ns) / 1e9
+
+    key = (request.method, request.endpoint or 'unknown', response.status_code)
+    counter = _count_cache.get(key)
+    if counter is None:
+        counter = _count_cache.setdefault(key, REQUEST_COUNT.labels(*key))
+    counter.inc()
+
+    duration_key = key[:2]
+    histogram = _duration_cache.get(duration_key)
+    if histogram is None:
+        histogram = _duration_cache.setdefault(
+            duration_key, REQUEST_DURATION.labels(*duration_key))
+    histogram.observe(duration)
+
     return response
 
 
+# The home payload never changes; encode it once instead of rebuilding
+# the dict and running json.dumps per request
+_HOME_BODY = b'{"code":"200","status":"OK"}'
+
+
 @app.route('/')
 def home():
-    return jsonify({
-        'code': '200',
-        'status': 'OK'
-    })
+    return Response(_HOME_BODY, mimetype='application/json')
 
 
 @app.route('/metrics')
@@ -52,5 +82,9 @@ def metrics():
     return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
 
 
+# Run under a real WSGI server for load tests; the Werkzeug dev server
+# bottlenecks the benchmark long before the autoscaler does:
+#   gunicorn -w $(nproc) -k gthread --threads 8 -b 0.0.0.0:5000 test-app:app
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # Local development fallback only
+    app.run(host='0.0.0.0', port=5000, threaded=True)
\ No newline at end of file